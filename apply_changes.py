@@ -0,0 +1,221 @@
+"""Apply a change feed from GET /api/academic/changes to a snapshot file.
+
+The snapshot has the shape of current_db_years.json (the nested tree returned
+by GET /api/academic). The feed is the JSON body returned by the changes
+endpoint: {"since": ..., "version": ..., "changes": [...]}.
+
+    python apply_changes.py current_db_years.json changes.json -o updated.json
+"""
+
+import argparse
+import json
+import sys
+
+import profiling
+
+# Parents before children; deletes are applied in reverse
+ENTITIES = ["Year", "Semester", "Unit", "Module", "Lesson", "Exam"]
+
+# Snapshot list each child entity lives in
+CHILD_LISTS = {"Lesson": "lessons", "Exam": "exams"}
+
+
+def insert_sorted(items, node):
+    """Insert node into a list kept in id order, like the API returns it."""
+    for index, item in enumerate(items):
+        if item["id"] > node["id"]:
+            items.insert(index, node)
+            return
+    items.append(node)
+
+
+def remove_by_id(items, node_id):
+    items[:] = [item for item in items if item["id"] != node_id]
+
+
+class SnapshotIndex:
+    """Id indexes over a snapshot so each change is applied without a tree walk."""
+
+    def __init__(self, years):
+        self.years = years
+        self.year_by_id = {}
+        self.semester_by_id = {}
+        self.unit_by_id = {}
+        # (list key, id) -> the year a semester or unit sits under, so a yearId change can move it
+        self.year_of = {}
+        # Shared modules appear under several semesters, so one id maps to many nodes
+        self.module_nodes = {}
+        # The lists each module id currently sits in, so moves and deletes skip the tree walk
+        self.module_lists = {}
+
+        for year in years:
+            self.year_by_id[year["id"]] = year
+            for semester in year.get("semesters") or []:
+                self.semester_by_id[semester["id"]] = semester
+                self.year_of[("semesters", semester["id"])] = year
+                self.index_modules(semester.setdefault("modules", []))
+            for unit in year.get("units") or []:
+                self.unit_by_id[unit["id"]] = unit
+                self.year_of[("units", unit["id"])] = year
+                self.index_modules(unit.setdefault("modules", []))
+            self.index_modules(year.setdefault("standaloneModules", []))
+
+    def index_modules(self, container):
+        for module in container:
+            self.attach_module(container, module, insert=False)
+
+    def attach_module(self, container, module, insert=True):
+        self.module_nodes.setdefault(module["id"], []).append(module)
+        self.module_lists.setdefault(module["id"], []).append(container)
+        if insert:
+            insert_sorted(container, module)
+
+    def module_containers(self, payload):
+        """Lists a module described by a change payload should be placed in."""
+        containers = []
+        for semester_id in payload.get("semesterIds") or []:
+            if semester_id in self.semester_by_id:
+                containers.append(self.semester_by_id[semester_id].setdefault("modules", []))
+        if payload.get("unitId") in self.unit_by_id:
+            containers.append(self.unit_by_id[payload["unitId"]].setdefault("modules", []))
+        if payload.get("standaloneYearId") in self.year_by_id:
+            year = self.year_by_id[payload["standaloneYearId"]]
+            containers.append(year.setdefault("standaloneModules", []))
+        return containers
+
+    def detach_module(self, module_id):
+        for container in self.module_lists.pop(module_id, []):
+            remove_by_id(container, module_id)
+        return self.module_nodes.pop(module_id, [])
+
+
+def apply_change(index, change):
+    entity = change["entity"]
+    op = change["op"]
+    payload = change.get("payload") or {}
+    node_id = change["entityId"]
+
+    if entity == "Year":
+        if op == "delete":
+            remove_by_id(index.years, node_id)
+            index.year_by_id.pop(node_id, None)
+        elif node_id in index.year_by_id:
+            index.year_by_id[node_id].update(payload)
+        else:
+            year = dict(payload, semesters=[], units=[], standaloneModules=[])
+            index.year_by_id[node_id] = year
+            insert_sorted(index.years, year)
+
+    elif entity in ("Semester", "Unit"):
+        by_id = index.semester_by_id if entity == "Semester" else index.unit_by_id
+        list_key = "semesters" if entity == "Semester" else "units"
+        year = index.year_by_id.get(change.get("parentId") or payload.get("yearId"))
+        previous_year = index.year_of.get((list_key, node_id))
+        if op == "delete":
+            by_id.pop(node_id, None)
+            index.year_of.pop((list_key, node_id), None)
+            parent = previous_year if previous_year is not None else year
+            if parent is not None:
+                remove_by_id(parent.get(list_key) or [], node_id)
+        elif node_id in by_id:
+            node = by_id[node_id]
+            node.update(payload)
+            # yearId changed: move the node, with its modules, under the new year
+            if year is not None and year is not previous_year:
+                if previous_year is not None:
+                    remove_by_id(previous_year.get(list_key) or [], node_id)
+                insert_sorted(year.setdefault(list_key, []), node)
+                index.year_of[(list_key, node_id)] = year
+        elif year is not None:
+            node = dict(payload, modules=[])
+            by_id[node_id] = node
+            insert_sorted(year.setdefault(list_key, []), node)
+            index.year_of[(list_key, node_id)] = year
+
+    elif entity == "Module":
+        # Placement can change on update, so detach everywhere and re-attach
+        previous = index.detach_module(node_id)
+        if op == "delete":
+            return
+        fields = {key: value for key, value in payload.items() if key != "semesterIds"}
+        children = {
+            "lessons": previous[0].get("lessons", []) if previous else [],
+            "exams": previous[0].get("exams", []) if previous else [],
+        }
+        for container in index.module_containers(payload):
+            node = dict(previous[0]) if previous else {}
+            node.update(fields)
+            # Each placement gets its own lists, like the API's nested includes
+            node.update({key: [dict(child) for child in value] for key, value in children.items()})
+            index.attach_module(container, node)
+
+    elif entity in CHILD_LISTS:
+        list_key = CHILD_LISTS[entity]
+        module_id = change.get("parentId") or payload.get("moduleId")
+        for module in index.module_nodes.get(module_id, []):
+            children = module.setdefault(list_key, [])
+            existing = next((child for child in children if child["id"] == node_id), None)
+            if op == "delete":
+                remove_by_id(children, node_id)
+            elif existing is not None:
+                existing.update(payload)
+            else:
+                insert_sorted(children, dict(payload))
+
+    else:
+        raise ValueError(f"Unknown entity in change feed: {entity!r}")
+
+
+def apply_feed(years, feed):
+    """Apply feed["changes"] to the snapshot in place and return it."""
+    index = SnapshotIndex(years)
+    changes = feed.get("changes") or []
+    rank = {entity: position for position, entity in enumerate(ENTITIES)}
+
+    # Writes top-down so parents exist before their children, then deletes bottom-up
+    writes = [change for change in changes if change["op"] != "delete"]
+    deletes = [change for change in changes if change["op"] == "delete"]
+    writes.sort(key=lambda change: (rank[change["entity"]], change["version"]))
+    deletes.sort(key=lambda change: (-rank[change["entity"]], change["version"]))
+
+    for change in writes + deletes:
+        apply_change(index, change)
+    return years
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("snapshot", help="snapshot JSON (e.g. current_db_years.json)")
+    parser.add_argument("feed", help="JSON body returned by GET /api/academic/changes")
+    parser.add_argument("-o", "--output", help="where to write the result (default: overwrite snapshot)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiler = profiling.from_args("apply_changes", args)
+
+    with profiler.stage("load") as stage:
+        with open(args.snapshot, encoding="utf-8") as f:
+            years = json.load(f)
+        with open(args.feed, encoding="utf-8") as f:
+            feed = json.load(f)
+        stage.items = len(feed.get("changes") or [])
+
+    with profiler.stage("expand") as stage:
+        apply_feed(years, feed)
+        stage.items = len(feed.get("changes") or [])
+        stage.per_item = True
+
+    with profiler.stage("render") as stage:
+        output = json.dumps(years, ensure_ascii=False, indent=2)
+        stage.items = len(years)
+
+    with profiler.stage("write") as stage:
+        with open(args.output or args.snapshot, "w", encoding="utf-8") as f:
+            f.write(output)
+        stage.items = len(years)
+
+    print(f"✅ Applied {len(feed.get('changes') or [])} changes, snapshot now at version {feed.get('version')}")
+    return profiling.finish(profiler, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
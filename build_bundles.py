@@ -0,0 +1,136 @@
+"""Build content-hashed per-year data bundles for the static site.
+
+Reads a snapshot shaped like current_db_years.json and writes, into the
+output directory (public/data by default, so Vite copies it into dist):
+
+    year-1.<hash>.json   one bundle per year, named by its content hash
+    manifest.json        year metadata, bundle files and a precache list
+
+The precache list uses the {url, revision} entries Workbox's
+precacheAndRoute() expects: bundles have a null revision because the hash is
+in the URL, and manifest.json itself is listed with the manifest version.
+Bundles whose hash is unchanged since the previous manifest are not
+rewritten, and bundles the new manifest no longer references are removed.
+
+    python build_bundles.py current_db_years.json --out public/data
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import profiling
+
+MANIFEST_NAME = "manifest.json"
+HASH_LENGTH = 12
+
+# Year fields copied into the manifest so the sidebar renders before any bundle loads
+YEAR_SUMMARY_FIELDS = ("id", "label", "color", "icon", "structure")
+
+
+def encode(data):
+    """Canonical compact JSON, so equal content always hashes the same."""
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def content_hash(payload):
+    return hashlib.sha256(payload).hexdigest()[:HASH_LENGTH]
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_bundles(years):
+    """Return [(year, file_name, payload)] for every year in the snapshot."""
+    bundles = []
+    for year in years:
+        payload = encode(year)
+        file_name = f"{year['id']}.{content_hash(payload)}.json"
+        bundles.append((year, file_name, payload))
+    return bundles
+
+
+def build_manifest(bundles, base_url):
+    entries = []
+    for year, file_name, payload in bundles:
+        entry = {field: year.get(field) for field in YEAR_SUMMARY_FIELDS}
+        entry.update({"file": base_url + file_name, "bytes": len(payload)})
+        entries.append(entry)
+
+    # Changes whenever any year does; clients can compare it before refetching
+    version = content_hash("".join(file_name for _, file_name, _ in bundles).encode("utf-8"))
+    precache = [{"url": entry["file"], "revision": None} for entry in entries]
+    # The manifest keeps its name, so Workbox needs a revision to notice it changed
+    precache.append({"url": base_url + MANIFEST_NAME, "revision": version})
+
+    return {"version": version, "years": entries, "precache": precache}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("snapshot", help="snapshot JSON (e.g. current_db_years.json)")
+    parser.add_argument("--out", default=os.path.join("public", "data"),
+                        help="output directory (default: public/data)")
+    parser.add_argument("--base-url", default="/data/",
+                        help="URL prefix of the output directory as served (default: /data/)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+    profiler = profiling.from_args("build_bundles", args)
+
+    with profiler.stage("load") as stage:
+        with open(args.snapshot, encoding="utf-8") as f:
+            years = json.load(f)
+        previous = load_manifest(args.out)
+        stage.items = len(years)
+
+    with profiler.stage("expand") as stage:
+        bundles = build_bundles(years)
+        stage.items = len(bundles)
+        stage.per_item = True
+
+    with profiler.stage("render") as stage:
+        manifest = build_manifest(bundles, args.base_url)
+        manifest_bytes = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+        stage.items = len(bundles)
+
+    with profiler.stage("write") as stage:
+        os.makedirs(args.out, exist_ok=True)
+        written = 0
+        for _, file_name, payload in bundles:
+            path = os.path.join(args.out, file_name)
+            if os.path.exists(path):
+                continue
+            with open(path, "wb") as f:
+                f.write(payload)
+            written += 1
+            print(f"✅ Created {file_name}")
+
+        # Only ever delete bundles this tool created, as listed by the previous manifest
+        current = {file_name for _, file_name, _ in bundles}
+        for entry in (previous or {}).get("years", []):
+            file_name = os.path.basename(entry["file"])
+            path = os.path.join(args.out, file_name)
+            if file_name not in current and os.path.exists(path):
+                os.remove(path)
+                print(f"🗑  Removed {file_name}")
+
+        manifest_path = os.path.join(args.out, MANIFEST_NAME)
+        if previous != manifest:
+            with open(manifest_path, "wb") as f:
+                f.write(manifest_bytes)
+            print(f"✅ Wrote {manifest_path} (version {manifest['version']})")
+        stage.items = written
+
+    print(f"✅ {len(bundles) - written} of {len(bundles)} year bundles unchanged")
+    return profiling.finish(profiler, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
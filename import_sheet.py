@@ -0,0 +1,295 @@
+"""Bulk-import lesson/exam titles and drive links from a CSV or XLSX sheet.
+
+Rows are streamed, validated against a snapshot shaped like
+current_db_years.json and merged into it in one pass using id indexes.
+Expected columns (header names are matched loosely):
+
+    year, module id, lesson id, title, driveUrl [, kind]
+
+`kind` is "lesson" (default) or "exam". Year may be an id ("year-2") or a
+number ("2"). The result is written as a snapshot (--output), as one SQL
+upsert per table (--sql), or both. Only rows that change something are
+emitted in the SQL delta, along with matching ChangeLog rows for the
+generated backend (--no-changelog to leave them out).
+
+    python import_sheet.py current_db_years.json links.xlsx --sql delta.sql
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+import profiling
+from apply_changes import insert_sorted
+
+KINDS = {"lesson": ("Lesson", "lessons"), "exam": ("Exam", "exams")}
+
+# Normalised header -> field
+COLUMNS = {
+    "year": "year",
+    "yearid": "year",
+    "module": "module_id",
+    "moduleid": "module_id",
+    "lesson": "lesson_id",
+    "lessonid": "lesson_id",
+    "id": "lesson_id",
+    "title": "title",
+    "driveurl": "drive_url",
+    "url": "drive_url",
+    "link": "drive_url",
+    "kind": "kind",
+    "type": "kind",
+}
+REQUIRED = ("year", "module_id", "lesson_id", "title", "drive_url")
+
+
+class SheetError(Exception):
+    pass
+
+
+def normalise_header(name):
+    return "".join(ch for ch in str(name or "").lower() if ch.isalnum())
+
+
+def read_csv(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        yield next(reader, [])
+        yield from reader
+
+
+def read_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise SheetError("XLSX import needs openpyxl (pip install openpyxl); or export the sheet as CSV")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ["" if value is None else str(value) for value in row]
+    finally:
+        workbook.close()
+
+
+def stream_rows(path):
+    """Yield (row_number, {field: value}) for every non-empty data row."""
+    reader = read_xlsx(path) if path.lower().endswith((".xlsx", ".xlsm")) else read_csv(path)
+    header = [COLUMNS.get(normalise_header(name)) for name in next(reader, [])]
+
+    missing = [field for field in REQUIRED if field not in header]
+    if missing:
+        raise SheetError(f"{path}: missing column(s): {', '.join(missing)}")
+
+    for row_number, values in enumerate(reader, start=2):
+        row = {field: str(value).strip() for field, value in zip(header, values) if field}
+        if any(row.values()):
+            yield row_number, row
+
+
+class TreeIndex:
+    """Id indexes over a snapshot; shared modules map to every node they appear as."""
+
+    def __init__(self, years):
+        self.year_ids = {year["id"] for year in years}
+        self.modules = {}
+        self.children = {}
+
+        for year in years:
+            nodes = list(year.get("standaloneModules") or [])
+            for parent in (year.get("semesters") or []) + (year.get("units") or []):
+                nodes.extend(parent.get("modules") or [])
+            for module in nodes:
+                self.modules.setdefault((year["id"], module["id"]), []).append(module)
+                for kind, (_, list_key) in KINDS.items():
+                    for child in module.get(list_key) or []:
+                        self.children.setdefault((module["id"], kind, child["id"]), []).append(child)
+
+    def resolve_year(self, value):
+        if value in self.year_ids:
+            return value
+        if value.isdigit() and f"year-{value}" in self.year_ids:
+            return f"year-{value}"
+        return None
+
+
+def validate(index, row):
+    """Return (year_id, kind) for a valid row or raise SheetError."""
+    missing = [field for field in REQUIRED if not row.get(field)]
+    if missing:
+        raise SheetError(f"empty {', '.join(missing)}")
+
+    year_id = index.resolve_year(row["year"])
+    if year_id is None:
+        raise SheetError(f"unknown year {row['year']!r}")
+    if (year_id, row["module_id"]) not in index.modules:
+        raise SheetError(f"module {row['module_id']!r} is not in {year_id}")
+
+    kind = (row.get("kind") or "lesson").lower()
+    if kind not in KINDS:
+        raise SheetError(f"kind must be lesson or exam, got {row.get('kind')!r}")
+    if row["title"] == "TO_BE_FILLED":
+        raise SheetError("title is still TO_BE_FILLED")
+    if not row["drive_url"].startswith(("https://", "http://")):
+        raise SheetError(f"driveUrl is not an http(s) link: {row['drive_url']!r}")
+    return year_id, kind
+
+
+def merge_rows(index, rows, update_only=False):
+    """Validate and merge rows into the indexed snapshot in one pass.
+
+    Returns (changes, errors): changes is a list of (op, kind, row) for rows
+    that inserted or modified a child; errors is a list of messages.
+    """
+    changes = []
+    errors = []
+    seen = {}
+
+    for row_number, row in rows:
+        try:
+            year_id, kind = validate(index, row)
+            key = (row["module_id"], kind, row["lesson_id"])
+            if key in seen:
+                raise SheetError(f"duplicate of row {seen[key]}")
+            seen[key] = row_number
+
+            existing = index.children.get(key)
+            if not existing and update_only:
+                raise SheetError(f"{kind} {row['lesson_id']!r} does not exist in {row['module_id']!r}")
+        except SheetError as error:
+            errors.append(f"row {row_number}: {error}")
+            continue
+
+        fields = {"title": row["title"], "driveUrl": row["drive_url"]}
+        if existing:
+            if all(child.get(name) == value for child in existing for name, value in fields.items()):
+                continue
+            for child in existing:
+                child.update(fields)
+            op = "update"
+        else:
+            _, list_key = KINDS[kind]
+            created = []
+            for module in index.modules[(year_id, row["module_id"])]:
+                child = {"id": row["lesson_id"], **fields, "moduleId": row["module_id"]}
+                # Kept in id order, like the API and apply_changes.py return them
+                insert_sorted(module.setdefault(list_key, []), child)
+                created.append(child)
+            index.children[key] = created
+            op = "insert"
+
+        changes.append((op, kind, {"id": row["lesson_id"], **fields, "moduleId": row["module_id"]}))
+
+    return changes, errors
+
+
+def sql_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def render_sql(changes, source, changelog=True):
+    inserted = sum(1 for op, _, _ in changes if op == "insert")
+    lines = [
+        f"-- Generated by import_sheet.py from {os.path.basename(source)}: "
+        f"{inserted} inserted, {len(changes) - inserted} updated",
+        "BEGIN;",
+    ]
+    if changelog:
+        # Same lock as the generated sync path, so ChangeLog versions become visible in order
+        lines.append("SELECT pg_advisory_xact_lock(hashtext('ChangeLog'));")
+
+    for kind, (table, _) in KINDS.items():
+        rows = [row for _, row_kind, row in changes if row_kind == kind]
+        if not rows:
+            continue
+        values = ",\n".join(
+            f"  ({sql_literal(row['id'])}, {sql_literal(row['title'])}, "
+            f"{sql_literal(row['driveUrl'])}, {sql_literal(row['moduleId'])})"
+            for row in rows
+        )
+        lines.append(
+            f'INSERT INTO "{table}" ("id", "title", "driveUrl", "moduleId") VALUES\n{values}\n'
+            f'ON CONFLICT ("id", "moduleId") DO UPDATE SET '
+            f'"title" = EXCLUDED."title", "driveUrl" = EXCLUDED."driveUrl";'
+        )
+
+    if changelog and changes:
+        # Same rows the generated sync path logs: bumps the version that the API's ETags and
+        # GET /api/academic/changes are built on, so caches and feed clients see the import
+        values = ",\n".join(
+            f"  ({sql_literal(KINDS[kind][0])}, {sql_literal(row['id'])}, {sql_literal(row['moduleId'])}, "
+            f"{sql_literal(op)}, {sql_literal(json.dumps(row, ensure_ascii=False))}::jsonb)"
+            for op, kind, row in changes
+        )
+        lines.append(f'INSERT INTO "ChangeLog" ("entity", "entityId", "parentId", "op", "payload") VALUES\n{values};')
+
+    lines.append("COMMIT;")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("snapshot", help="snapshot JSON (e.g. current_db_years.json)")
+    parser.add_argument("sheet", help="CSV or XLSX file")
+    parser.add_argument("-o", "--output", help="write the merged snapshot here")
+    parser.add_argument("--sql", help="write the SQL delta here")
+    parser.add_argument("--no-changelog", dest="changelog", action="store_false",
+                        help="omit ChangeLog rows from the SQL delta (Supabase schema, which has no ChangeLog)")
+    parser.add_argument("--update-only", action="store_true",
+                        help="reject rows for lessons/exams that do not exist yet")
+    parser.add_argument("--skip-invalid", action="store_true",
+                        help="write the valid rows even if some rows fail validation")
+    profiling.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if not args.output and not args.sql:
+        parser.error("nothing to write: pass --output and/or --sql")
+
+    profiler = profiling.from_args("import_sheet", args)
+
+    with profiler.stage("load") as stage:
+        with open(args.snapshot, encoding="utf-8") as f:
+            years = json.load(f)
+        index = TreeIndex(years)
+        stage.items = len(index.modules)
+
+    with profiler.stage("expand") as stage:
+        try:
+            changes, errors = merge_rows(index, stream_rows(args.sheet), args.update_only)
+        except SheetError as error:
+            print(f"❌ {error}", file=sys.stderr)
+            return 1
+        stage.items = len(changes) + len(errors)
+        stage.per_item = True
+
+    for message in errors:
+        print(f"❌ {message}", file=sys.stderr)
+    if errors and not args.skip_invalid:
+        print(f"❌ {len(errors)} invalid rows; nothing written (use --skip-invalid to write the rest)",
+              file=sys.stderr)
+        return 1
+
+    with profiler.stage("render") as stage:
+        outputs = []
+        if args.output:
+            outputs.append((args.output, json.dumps(years, ensure_ascii=False, indent=2)))
+        if args.sql:
+            outputs.append((args.sql, render_sql(changes, args.sheet, args.changelog)))
+        stage.items = len(changes)
+
+    with profiler.stage("write") as stage:
+        for path, content in outputs:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+            print(f"✅ Wrote {path}")
+        stage.items = len(outputs)
+
+    inserted = sum(1 for op, _, _ in changes if op == "insert")
+    print(f"✅ {inserted} inserted, {len(changes) - inserted} updated, {len(errors)} skipped")
+    return profiling.finish(profiler, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
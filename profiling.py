@@ -0,0 +1,168 @@
+"""Per-stage profiling shared by the generator and the snapshot tools.
+
+Each tool splits its work into stages (load, expand, render, write) and
+records wall time, peak traced memory allocated on top of what earlier
+stages left alive, and an item count for each. Stages whose cost grows with
+their item count set `per_item` so the baseline check scales by it:
+
+    profiler = profiling.from_args("apply_changes", args)
+    with profiler.stage("expand") as stage:
+        apply_feed(years, feed)
+        stage.items = len(feed["changes"])
+        stage.per_item = True
+    sys.exit(profiling.finish(profiler, args))
+
+`--profile report.json` writes the JSON report; `--profile-baseline
+baseline.json` compares against a stored report and exits non-zero when a
+stage is more than `--max-slowdown` times slower or hungrier.
+"""
+
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Stages below these are mostly noise: not compared, or compared against the floor
+NOISE_FLOOR_SECONDS = 0.005
+NOISE_FLOOR_BYTES = 1 << 20
+
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.per_item = False
+        self.wall_seconds = 0.0
+        self.peak_bytes = 0
+        self._started = None
+        self._traced_at_start = 0
+
+    def as_dict(self):
+        return {
+            "wall_seconds": round(self.wall_seconds, 6),
+            "peak_bytes": self.peak_bytes,
+            "items": self.items,
+            "per_item": self.per_item,
+        }
+
+
+class Profiler:
+    """Collects stages; does nothing (and costs nothing) when disabled."""
+
+    def __init__(self, tool, enabled=True):
+        self.tool = tool
+        self.enabled = enabled
+        self.stages = []
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start(self, name):
+        stage = Stage(name)
+        if self.enabled:
+            tracemalloc.reset_peak()
+            # Memory still held from earlier stages is not this stage's cost
+            stage._traced_at_start = tracemalloc.get_traced_memory()[0]
+            stage._started = time.perf_counter()
+        return stage
+
+    def stop(self, stage, items=None):
+        if items is not None:
+            stage.items = items
+        if self.enabled:
+            stage.wall_seconds = time.perf_counter() - stage._started
+            stage.peak_bytes = tracemalloc.get_traced_memory()[1] - stage._traced_at_start
+            self.stages.append(stage)
+        return stage
+
+    @contextmanager
+    def stage(self, name):
+        stage = self.start(name)
+        try:
+            yield stage
+        finally:
+            self.stop(stage)
+
+    def report(self):
+        return {
+            "tool": self.tool,
+            "python": platform.python_version(),
+            "total_wall_seconds": round(sum(stage.wall_seconds for stage in self.stages), 6),
+            "stages": {stage.name: stage.as_dict() for stage in self.stages},
+        }
+
+
+def compare(report, baseline, max_slowdown=2.0):
+    """Return one message per stage that regressed past max_slowdown x baseline.
+
+    For per-item stages the baseline time is scaled to the current item count
+    first, so a larger (or smaller) run is not reported as a slowdown; the
+    noise floor is applied to that scaled time.
+    """
+    regressions = []
+    for name, current in report["stages"].items():
+        previous = baseline.get("stages", {}).get(name)
+        if previous is None:
+            continue
+
+        now = current["wall_seconds"]
+        expected = previous["wall_seconds"]
+        if now >= NOISE_FLOOR_SECONDS or expected >= NOISE_FLOOR_SECONDS:
+            if current.get("per_item") and previous.get("per_item") and current["items"] and previous["items"]:
+                expected = expected / previous["items"] * current["items"]
+            expected = max(expected, NOISE_FLOOR_SECONDS)
+            if now > expected * max_slowdown:
+                regressions.append(
+                    f"{name}: {now:.4f}s vs expected {expected:.4f}s from baseline "
+                    f"{previous['wall_seconds']:.4f}s ({now / expected:.1f}x, limit {max_slowdown:g}x)"
+                )
+
+        if current["peak_bytes"] > max(previous["peak_bytes"], NOISE_FLOOR_BYTES) * max_slowdown:
+            regressions.append(
+                f"{name}: peak memory {current['peak_bytes']} B vs baseline {previous['peak_bytes']} B "
+                f"(limit {max_slowdown:g}x)"
+            )
+    return regressions
+
+
+def add_arguments(parser):
+    group = parser.add_argument_group("profiling")
+    group.add_argument("--profile", metavar="REPORT",
+                       help="write per-stage wall time, peak memory and item counts to REPORT (JSON)")
+    group.add_argument("--profile-baseline", metavar="BASELINE",
+                       help="exit non-zero if a stage regresses past --max-slowdown against BASELINE")
+    group.add_argument("--max-slowdown", type=float, default=2.0,
+                       help="allowed ratio against the baseline (default: 2.0)")
+
+
+def from_args(tool, args):
+    return Profiler(tool, enabled=bool(args.profile or args.profile_baseline))
+
+
+def finish(profiler, args):
+    """Write/print the report and run the baseline check. Returns an exit code."""
+    if not profiler.enabled:
+        return 0
+
+    report = profiler.report()
+    for name, stage in report["stages"].items():
+        print(f"⏱  {name:<8} {stage['wall_seconds']:>9.4f}s  "
+              f"{stage['peak_bytes'] / 1024:>10.1f} KiB  {stage['items']:>7} items")
+
+    if args.profile:
+        with open(args.profile, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Profile written to {args.profile}")
+
+    if args.profile_baseline:
+        with open(args.profile_baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_slowdown)
+        for message in regressions:
+            print(f"❌ Regression in {message}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"✅ No stage regressed past {args.max_slowdown:g}x {args.profile_baseline}")
+
+    return 0